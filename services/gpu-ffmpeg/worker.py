@@ -1,52 +1,153 @@
 import asyncio
+import functools
 import json
 import logging
 import os
 import platform
+import queue
+import re
 import shlex
+import shutil
+import struct
 import subprocess
+import threading
 import time
-from collections import deque
-from datetime import datetime, timezone
+from collections import OrderedDict
 from pathlib import Path
 
 import httpx
 import yaml
 
+try:
+    from orjson import loads as json_loads
+except ImportError:  # stdlib json also parses bytes, just slower
+    json_loads = json.loads
+
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as YamlLoader
+
+try:
+    import uvloop
+except ImportError:  # the stock event loop works, it just has more I/O overhead
+    uvloop = None
+
 logging.addLevelName(logging.DEBUG, "VERBOSE")
 
 LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
 if LOG_LEVEL == "VERBOSE":
     LOG_LEVEL = "DEBUG"
 ORCHESTRATOR_URL = os.environ.get("ORCHESTRATOR_URL", "http://localhost:9000")
-STREAM_READER_LIMIT = int(os.environ.get("GPU_STREAM_READER_LIMIT", "1000000"))
+# Both orchestrator clients keep idle connections around between progress updates
+# and log batches instead of reconnecting for each request.
+ORCHESTRATOR_LIMITS = httpx.Limits(
+    max_connections=32, max_keepalive_connections=16, keepalive_expiry=60.0
+)
+# Fail fast when the orchestrator is unreachable; established requests may take longer.
+ORCHESTRATOR_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+
+
+def _utc_isoformat(created: float) -> str:
+    whole = int(created)
+    micros = int((created - whole) * 1_000_000)
+    return f"{time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(whole))}.{micros:06d}Z"
+
+
+LOG_BATCH_SIZE = 100
+LOG_FLUSH_INTERVAL = 0.25
+_LOG_SENTINEL = None
+# Only used to render tracebacks; the orchestrator stores timestamp/level/logger separately.
+_TRACEBACK_FORMATTER = logging.Formatter()
+
+
+def _record_message(record: logging.LogRecord) -> str:
+    message = record.getMessage()
+    if record.exc_info and not record.exc_text:
+        # Cached on the record so the console handler doesn't render the traceback again.
+        record.exc_text = _TRACEBACK_FORMATTER.formatException(record.exc_info)
+    if record.exc_text:
+        message = f"{message}\n{record.exc_text}"
+    if record.stack_info:
+        message = f"{message}\n{record.stack_info}"
+    return message
 
 
 class OrchestratorLogHandler(logging.Handler):
-    def __init__(self, base_url: str) -> None:
+    def __init__(self, base_url: str, max_queue: int = 10_000) -> None:
         super().__init__()
-        self._client = httpx.Client(base_url=base_url, timeout=5.0)
+        self._client = httpx.Client(
+            base_url=base_url,
+            timeout=5.0,
+            limits=ORCHESTRATOR_LIMITS,
+        )
+        self._queue: queue.Queue[dict | None] = queue.Queue(maxsize=max_queue)
+        self._sender = threading.Thread(
+            target=self._send_batches, name="orchestrator-log-sender", daemon=True
+        )
+        self._sender.start()
 
     def emit(self, record: logging.LogRecord) -> None:
-        message = self.format(record)
-        payload = {
-            "entries": [
-                {
-                    "timestamp": datetime.fromtimestamp(
-                        record.created, tz=timezone.utc
-                    ).isoformat(),
-                    "level": record.levelname,
-                    "logger": record.name,
-                    "message": message,
-                }
-            ]
-        }
+        if record.levelno < self.level:
+            return
         try:
-            self._client.post("/api/logs/ingest", json=payload)
+            entry = {
+                "timestamp": _utc_isoformat(record.created),
+                "level": record.levelname,
+                "levelno": record.levelno,
+                "logger": record.name,
+                "message": _record_message(record),
+            }
         except Exception:  # noqa: BLE001
-            # Remote logging failures should not block worker progress.
+            self.handleError(record)
+            return
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            # Drop records rather than stall the worker while the orchestrator is unreachable.
             return
 
+    def _next_batch(self) -> tuple[list[dict], bool]:
+        first = self._queue.get()
+        if first is _LOG_SENTINEL:
+            return [], True
+        entries = [first]
+        deadline = time.monotonic() + LOG_FLUSH_INTERVAL
+        while len(entries) < LOG_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry is _LOG_SENTINEL:
+                return entries, True
+            entries.append(entry)
+        return entries, False
+
+    def _send_batches(self) -> None:
+        stopping = False
+        while not stopping:
+            entries, stopping = self._next_batch()
+            if not entries:
+                continue
+            try:
+                self._client.post("/api/logs/ingest", json={"entries": entries})
+            except Exception:  # noqa: BLE001
+                # Remote logging failures should not block worker progress.
+                continue
+
+    def close(self) -> None:
+        if self._sender.is_alive():
+            try:
+                self._queue.put(_LOG_SENTINEL, timeout=1.0)
+            except queue.Full:
+                pass
+            self._sender.join(timeout=5.0)
+        self._client.close()
+        super().close()
+
 
 def configure_logging() -> logging.Logger:
     logging.basicConfig(
@@ -56,14 +157,29 @@ def configure_logging() -> logging.Logger:
     logger = logging.getLogger("gpu-ffmpeg.worker")
     handler = OrchestratorLogHandler(ORCHESTRATOR_URL)
     handler.setLevel(logging.getLevelName(LOG_LEVEL))
-    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
     logger.addHandler(handler)
     return logger
 
 
 LOGGER = configure_logging()
 
-POLL_INTERVAL = int(os.environ.get("GPU_POLL_INTERVAL", "5"))
+# Empty polls back off from the minimum to GPU_POLL_INTERVAL; claimed jobs shorten the
+# wait again, so a busy queue is drained quickly and an idle one polled rarely.
+POLL_INTERVAL = float(os.environ.get("GPU_POLL_INTERVAL", "5"))
+POLL_MIN_INTERVAL = min(float(os.environ.get("GPU_POLL_MIN_INTERVAL", "0.05")), POLL_INTERVAL)
+POLL_BACKOFF = 1.5
+POLL_SPEEDUP = 0.7
+# Seconds the orchestrator may hold an empty claim open until a job is queued; capped at
+# the orchestrator's 25s limit and kept below ORCHESTRATOR_TIMEOUT's read timeout. Older
+# orchestrators answer immediately.
+MAX_CLAIM_WAIT = min(25.0, ORCHESTRATOR_TIMEOUT.read - 5.0)
+CLAIM_WAIT = max(0.0, min(float(os.environ.get("GPU_CLAIM_WAIT", "20")), MAX_CLAIM_WAIT))
+NVENC_CAPS_CACHE = Path(os.environ.get("GPU_NVENC_CAPS_CACHE", "/tmp/nvenc_caps.json"))
+# Resolved once: absolute paths skip the PATH search on every spawn and, together with
+# close_fds=False (Python's own descriptors are non-inheritable anyway), let subprocess
+# use posix_spawn instead of forking the worker.
+FFMPEG_BIN = shutil.which("ffmpeg") or "ffmpeg"
+FFPROBE_BIN = shutil.which("ffprobe") or "ffprobe"
 # Keep scaling on the GPU to avoid format mismatches between CUDA surfaces and
 # software filters.
 SCALING_EXPRESSION = "scale_cuda=-2:720:force_original_aspect_ratio=decrease"
@@ -76,12 +192,52 @@ def _detect_host_environment() -> dict[str, bool]:
     return {"is_wsl": "microsoft" in release or "microsoft" in version}
 
 
+def _write_json_atomic(path: Path, payload: dict) -> None:
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp_path.open("w", encoding="utf-8") as fh:
+            json.dump(payload, fh)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _nvenc_cache_key() -> list | None:
+    ffmpeg_path = shutil.which(FFMPEG_BIN)
+    if ffmpeg_path is None:
+        return None
+    stat = os.stat(ffmpeg_path)
+    try:
+        driver = Path("/proc/driver/nvidia/version").read_text(encoding="utf-8").strip()
+    except OSError:
+        driver = ""
+    return [ffmpeg_path, stat.st_mtime_ns, stat.st_size, platform.uname().release, driver]
+
+
 def _probe_nvenc_capabilities() -> dict[str, bool]:
+    # The probe spawns ffmpeg, so reuse the last result until ffmpeg, the kernel
+    # or the NVIDIA driver changes.
+    cache_key = _nvenc_cache_key()
+    if cache_key is not None:
+        try:
+            cached = json.loads(NVENC_CAPS_CACHE.read_text(encoding="utf-8"))
+            if cached.get("key") == cache_key:
+                capabilities = dict(cached["capabilities"])
+                LOGGER.info(
+                    "NVENC capabilities loaded from cache (vbr_hq=%s, multipass_fullres=%s)",
+                    capabilities["rc_vbr_hq"],
+                    capabilities["multipass_fullres"],
+                )
+                return capabilities
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            pass
+
     capabilities = {"rc_vbr_hq": True, "multipass_fullres": True}
     try:
         result = subprocess.run(
             [
-                "ffmpeg",
+                FFMPEG_BIN,
                 "-hide_banner",
                 "-loglevel",
                 "quiet",
@@ -91,6 +247,7 @@ def _probe_nvenc_capabilities() -> dict[str, bool]:
             check=True,
             capture_output=True,
             text=True,
+            close_fds=False,
         )
     except subprocess.SubprocessError as exc:
         LOGGER.warning("Unable to probe NVENC encoder capabilities: %s", exc)
@@ -105,6 +262,11 @@ def _probe_nvenc_capabilities() -> dict[str, bool]:
         capabilities["rc_vbr_hq"],
         capabilities["multipass_fullres"],
     )
+    if cache_key is not None:
+        try:
+            _write_json_atomic(NVENC_CAPS_CACHE, {"key": cache_key, "capabilities": capabilities})
+        except OSError as exc:
+            LOGGER.debug("Unable to write NVENC capability cache %s: %s", NVENC_CAPS_CACHE, exc)
     return capabilities
 
 
@@ -115,11 +277,35 @@ if HOST_ENVIRONMENT["is_wsl"]:
     LOGGER.warning("Detected WSL kernel; NVENC rate-control and multipass support may be limited")
 
 CONFIG_PATH = Path(os.environ.get("CONFIG_PATH", "/app/config/settings.yaml"))
-try:
-    with CONFIG_PATH.open("r", encoding="utf-8") as fh:
-        _CONFIG = yaml.safe_load(fh) or {}
-except FileNotFoundError:
-    _CONFIG = {}
+
+
+def _load_settings(path: Path) -> dict:
+    # Reuse the JSON sidecar while the YAML is unchanged; JSON loads far faster than YAML.
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return {}
+    cache_path = path.with_suffix(".yaml.cache.json")
+    cache_key = [stat.st_mtime_ns, stat.st_size]
+    try:
+        with cache_path.open("r", encoding="utf-8") as fh:
+            cached = json.load(fh)
+        if cached.get("key") == cache_key:
+            return cached.get("config") or {}
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    with path.open("r", encoding="utf-8") as fh:
+        config = yaml.load(fh, Loader=YamlLoader) or {}
+    try:
+        _write_json_atomic(cache_path, {"key": cache_key, "config": config})
+    except (OSError, TypeError, ValueError) as exc:
+        # A read-only config mount or non-JSON YAML values only cost the cache.
+        LOGGER.debug("Unable to write settings cache %s: %s", cache_path, exc)
+    return config
+
+
+_CONFIG = _load_settings(CONFIG_PATH)
 PROFILES = _CONFIG.get("profiles", {})
 if _CONFIG:
     LOGGER.info(
@@ -130,7 +316,7 @@ if _CONFIG:
 else:
     LOGGER.warning("No settings config present at %s; using defaults", CONFIG_PATH)
 FFPROBE_ANALYSIS_CMD = [
-    "ffprobe",
+    FFPROBE_BIN,
     "-v",
     "quiet",
     "-print_format",
@@ -140,66 +326,123 @@ FFPROBE_ANALYSIS_CMD = [
 ]
 OPERATIONAL_CONFIG = _CONFIG.get("operational", {})
 REMOVE_ORIGINAL = bool(OPERATIONAL_CONFIG.get("remove_original_after_success", False))
-
-
-def probe_file(filepath: str | Path) -> dict:
-    command = [*FFPROBE_ANALYSIS_CMD, str(filepath)]
+# The source probe is authoritative; operators can skip re-probing fresh outputs.
+VERIFY_OUTPUT_DURATION = bool(OPERATIONAL_CONFIG.get("verify_output_duration", True))
+# Concurrent encodes per worker; consumer NVENC parts allow a few sessions at once.
+MAX_CONCURRENT_JOBS = max(
+    1,
+    int(os.environ.get("GPU_CONCURRENCY") or OPERATIONAL_CONFIG.get("max_concurrent_jobs") or 1),
+)
+GPU_COUNT = max(1, int(os.environ.get("GPU_COUNT", "1")))
+
+
+def _available_cpus() -> int:
+    # The affinity mask reflects a container's cpuset; cpu_count() reports the host.
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# NVENC does the video encode, but demux, filters and audio still take CPU threads; each
+# ffmpeg gets an equal share of the cores so concurrent encodes don't oversubscribe them.
+FFMPEG_THREADS = max(
+    1,
+    int(os.environ.get("GPU_FFMPEG_THREADS") or _available_cpus() // MAX_CONCURRENT_JOBS),
+)
+# Matches the orchestrator's upper bound for /api/jobs/next?batch=N.
+MAX_CLAIM_BATCH = 16
+
+
+PROBE_CACHE_SIZE = 256
+PROGRESS_READ_SIZE = 8192
+MP4_MAX_BOXES = 32
+FFMPEG_LOG_READ_SIZE = 65536
+FFMPEG_LOG_LINE_BREAK = re.compile(rb"[\r\n]")
+FFMPEG_LOG_TAIL_BYTES = 65536
+FFMPEG_LOG_TAIL_LINES = 100
+PROGRESS_INTERVAL = 1.0
+_PROBE_CACHE: OrderedDict[str, tuple[tuple[int, int], dict]] = OrderedDict()
+_PROBE_CACHE_LOCK = threading.Lock()
+
+
+def probe_file(filepath: str | Path, stat: os.stat_result | None = None) -> dict:
+    # ffprobe output only changes with the file, so reuse it while size and mtime match.
+    path = str(filepath)
+    if stat is None:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return _run_ffprobe(path)
+    fingerprint = (stat.st_size, stat.st_mtime_ns)
+    with _PROBE_CACHE_LOCK:
+        cached = _PROBE_CACHE.get(path)
+        if cached is not None and cached[0] == fingerprint:
+            _PROBE_CACHE.move_to_end(path)
+            return dict(cached[1])
+    analysis = _run_ffprobe(path)
+    with _PROBE_CACHE_LOCK:
+        if analysis:
+            _PROBE_CACHE[path] = (fingerprint, analysis)
+            _PROBE_CACHE.move_to_end(path)
+            while len(_PROBE_CACHE) > PROBE_CACHE_SIZE:
+                _PROBE_CACHE.popitem(last=False)
+        else:
+            _PROBE_CACHE.pop(path, None)
+    return dict(analysis)
+
+
+def _run_ffprobe(filepath: str) -> dict:
+    command = [*FFPROBE_ANALYSIS_CMD, filepath]
     try:
         result = subprocess.run(
             command,
             check=True,
             capture_output=True,
-            text=True,
+            close_fds=False,
         )
     except subprocess.SubprocessError as exc:
         LOGGER.warning("ffprobe analysis failed for %s: %s", filepath, exc)
         return {}
     try:
-        return json.loads(result.stdout)
-    except json.JSONDecodeError:
+        return json_loads(result.stdout)
+    except ValueError:
         LOGGER.warning("Failed to parse ffprobe output for %s", filepath)
         return {}
 
 
+_LANGUAGE_ALIASES = {"swe": "swe", "sv": "swe", "eng": "eng", "en": "eng"}
+
+
 def _normalize_language(language: str | None) -> str | None:
     if not language:
         return None
     code = language.lower()
-    if code in {"swe", "sv"}:
-        return "swe"
-    if code in {"eng", "en"}:
-        return "eng"
-    return code
+    return _LANGUAGE_ALIASES.get(code, code)
 
 
 def _gather_streams(streams: list[dict]) -> tuple[bool, list[dict], list[dict]]:
     video_present = False
     audio_streams: list[dict] = []
     subtitle_streams: list[dict] = []
-    audio_pos = 0
-    subtitle_pos = 0
     for stream in streams:
         codec_type = stream.get("codec_type")
         if codec_type == "video":
             video_present = True
-        elif codec_type == "audio":
-            audio_streams.append(
-                {
-                    "input_index": audio_pos,
-                    "language": _normalize_language(stream.get("tags", {}).get("language")),
-                    "disposition": stream.get("disposition", {}),
-                }
-            )
-            audio_pos += 1
+            continue
+        if codec_type == "audio":
+            target = audio_streams
         elif codec_type == "subtitle":
-            subtitle_streams.append(
-                {
-                    "input_index": subtitle_pos,
-                    "language": _normalize_language(stream.get("tags", {}).get("language")),
-                    "disposition": stream.get("disposition", {}),
-                }
-            )
-            subtitle_pos += 1
+            target = subtitle_streams
+        else:
+            continue
+        target.append(
+            {
+                "input_index": len(target),
+                "language": _normalize_language(stream.get("tags", {}).get("language")),
+                "disposition": stream.get("disposition", {}),
+            }
+        )
     return video_present, audio_streams, subtitle_streams
 
 
@@ -231,14 +474,9 @@ def _select_priority_streams(stream_list: list[dict]) -> tuple[list[dict], int |
         mapped.append(candidate)
         seen_inputs.add(idx)
 
-    default_idx: int | None = None
-    if swedish:
-        for i, stream in enumerate(mapped):
-            if stream in swedish:
-                default_idx = i
-                break
-    elif mapped:
-        default_idx = 0
+    # Swedish streams are mapped first, so the preferred default is always the
+    # first output stream.
+    default_idx: int | None = 0 if mapped else None
     return mapped, default_idx
 
 
@@ -252,22 +490,10 @@ def _build_disposition_flags(
     return flags
 
 
-def build_ffmpeg_command(  # noqa: C901
-    analysis_json: dict, input_path: Path, output_path: Path
-) -> list[str]:
-    profile = analysis_json.get("encoding") or PROFILES.get(
-        analysis_json.get("profile"),
-        {},
-    )
-
-    profile = profile or {}
-    maxrate = profile.get("max_bitrate", "8M")
-    bufsize = profile.get("bufsize", "16M")
-    level = profile.get("level", "4.1")
-    max_fps = int(profile.get("max_fps", 30) or 30)
-    preset = str(profile.get("preset", "p5"))
-    rc_mode = str(profile.get("rc", "vbr_hq")).lower()
-    cq = str(profile.get("cq", 18))
+@functools.lru_cache(maxsize=16)
+def _video_encode_args(
+    max_fps: int, preset: str, rc_mode: str, cq: str, level: str, maxrate: str, bufsize: str
+) -> tuple[str, ...]:
     multipass_mode: str | None = None
     if rc_mode == "vbr_hq":
         multipass_mode = "fullres"
@@ -285,10 +511,80 @@ def build_ffmpeg_command(  # noqa: C901
             "NVENC multipass fullres mode is unavailable; continuing without multipass",
         )
         multipass_mode = None
-    audio_cfg = profile.get("audio", {})
-    audio_codec = audio_cfg.get("codec", "aac")
-    audio_bitrate = audio_cfg.get("bitrate", "192k")
-    audio_channels = int(audio_cfg.get("channels", 2) or 2)
+
+    filters = [SCALING_EXPRESSION]
+    if max_fps > 0:
+        filters.append(f"fps={min(max_fps, 30)}")
+
+    args = [
+        "-vf",
+        ",".join(filters),
+        "-c:v",
+        "h264_nvenc",
+        "-rc",
+        rc_mode,
+        "-preset",
+        preset,
+        "-profile:v",
+        "high",
+        "-level",
+        level,
+        "-cq",
+        cq,
+        "-maxrate",
+        maxrate,
+        "-bufsize",
+        bufsize,
+        "-movflags",
+        "+faststart",
+    ]
+    if multipass_mode:
+        args.extend(["-multipass", multipass_mode])
+    return tuple(args)
+
+
+@functools.lru_cache(maxsize=16)
+def _audio_encode_args(codec: str, bitrate: str, channels: int) -> tuple[str, ...]:
+    return ("-c:a", codec, "-b:a", bitrate, "-ac", str(channels))
+
+
+# Fixed head and tail of every encode command; only the paths and the stream
+# mapping vary per job.
+FFMPEG_INPUT_ARGS = (
+    FFMPEG_BIN,
+    "-y",
+    "-filter_threads",
+    str(FFMPEG_THREADS),
+    "-hwaccel",
+    "cuda",
+    "-hwaccel_output_format",
+    "cuda",
+)
+FFMPEG_THREAD_ARGS = ("-threads", str(FFMPEG_THREADS))
+# Emit one progress block per second; ffmpeg defaults to every 0.5s.
+FFMPEG_PROGRESS_ARGS = ("-stats_period", "1", "-progress", "pipe:1")
+
+
+def build_ffmpeg_command(
+    analysis_json: dict, input_path: Path, output_path: Path, gpu_id: int | None = None
+) -> list[str]:
+    profile = analysis_json.get("encoding") or PROFILES.get(
+        analysis_json.get("profile"),
+        {},
+    )
+
+    profile = profile or {}
+    # The profile-derived arguments are identical for every job sharing a profile,
+    # so they are built once per distinct profile and reused.
+    video_args = _video_encode_args(
+        int(profile.get("max_fps", 30) or 30),
+        str(profile.get("preset", "p5")),
+        str(profile.get("rc", "vbr_hq")).lower(),
+        str(profile.get("cq", 18)),
+        profile.get("level", "4.1"),
+        profile.get("max_bitrate", "8M"),
+        profile.get("bufsize", "16M"),
+    )
 
     streams = analysis_json.get("streams", [])
     video_present, audio_streams, subtitle_streams = _gather_streams(streams)
@@ -296,16 +592,10 @@ def build_ffmpeg_command(  # noqa: C901
     selected_audio, default_audio_idx = _select_priority_streams(audio_streams)
     selected_subtitles, default_sub_idx = _select_priority_streams(subtitle_streams)
 
-    command: list[str] = [
-        "ffmpeg",
-        "-y",
-        "-hwaccel",
-        "cuda",
-        "-hwaccel_output_format",
-        "cuda",
-        "-i",
-        str(input_path),
-    ]
+    command = list(FFMPEG_INPUT_ARGS)
+    if gpu_id is not None:
+        command.extend(["-hwaccel_device", str(gpu_id)])
+    command.extend(["-i", str(input_path)])
 
     if video_present:
         command.extend(["-map", "0:v"])
@@ -316,61 +606,30 @@ def build_ffmpeg_command(  # noqa: C901
     for subtitle_stream in selected_subtitles:
         command.extend(["-map", f"0:s:{subtitle_stream['input_index']}"])
 
-    audio_dispositions = _build_disposition_flags(selected_audio, default_audio_idx, "a")
-    subtitle_dispositions = _build_disposition_flags(selected_subtitles, default_sub_idx, "s")
-
-    filters = [SCALING_EXPRESSION]
-    if max_fps > 0:
-        filters.append(f"fps={min(max_fps, 30)}")
-    video_filter = ",".join(filters)
-
-    command.extend(
-        [
-            "-vf",
-            video_filter,
-            "-c:v",
-            "h264_nvenc",
-            "-rc",
-            rc_mode,
-            "-preset",
-            preset,
-            "-profile:v",
-            "high",
-            "-level",
-            level,
-            "-cq",
-            cq,
-            "-maxrate",
-            maxrate,
-            "-bufsize",
-            bufsize,
-            "-movflags",
-            "+faststart",
-        ]
-    )
-
-    if multipass_mode:
-        command.extend(["-multipass", multipass_mode])
+    command.extend(video_args)
+    if gpu_id is not None:
+        command.extend(["-gpu", str(gpu_id)])
 
     if selected_audio:
+        audio_cfg = profile.get("audio", {})
         command.extend(
-            [
-                "-c:a",
-                audio_codec,
-                "-b:a",
-                audio_bitrate,
-                "-ac",
-                str(audio_channels),
-            ]
+            _audio_encode_args(
+                audio_cfg.get("codec", "aac"),
+                audio_cfg.get("bitrate", "192k"),
+                int(audio_cfg.get("channels", 2) or 2),
+            )
         )
 
     if selected_subtitles:
         command.extend(["-c:s", "mov_text"])
 
-    command.extend(audio_dispositions)
-    command.extend(subtitle_dispositions)
+    command.extend(_build_disposition_flags(selected_audio, default_audio_idx, "a"))
+    command.extend(_build_disposition_flags(selected_subtitles, default_sub_idx, "s"))
 
-    command.extend(["-progress", "pipe:1", str(output_path)])
+    command.extend(FFMPEG_THREAD_ARGS)
+    command.extend(FFMPEG_PROGRESS_ARGS)
+    # The muxer is explicit because the encoder writes to a ".partial" file name.
+    command.extend(["-f", "mp4", str(output_path)])
 
     return command
 
@@ -379,38 +638,89 @@ def _loggable_command(command: list[str]) -> str:
     return " ".join(shlex.quote(arg) for arg in command)
 
 
+def _decode_log_line(line: bytes) -> str:
+    return line.decode("utf-8", "replace").strip()
+
+
+def _collect_ffmpeg_logs(stream, log_tail: bytearray) -> None:
+    # Keep only the raw tail of stderr; lines are decoded once, and only when a
+    # failed job needs them (or debug logging is on).
+    debug = LOGGER.isEnabledFor(logging.DEBUG)
+    pending = b""
+    while chunk := stream.read1(FFMPEG_LOG_READ_SIZE):
+        log_tail.extend(chunk)
+        if len(log_tail) > FFMPEG_LOG_TAIL_BYTES:
+            del log_tail[:-FFMPEG_LOG_TAIL_BYTES]
+        if not debug:
+            continue
+        # The stats line is rewritten in place with "\r", so both end a log line.
+        *lines, pending = FFMPEG_LOG_LINE_BREAK.split(pending + chunk)
+        if len(pending) > FFMPEG_LOG_READ_SIZE:
+            # A line this long is logged as-is rather than buffered without bound.
+            lines.append(pending)
+            pending = b""
+        for line in lines:
+            if line:
+                LOGGER.debug("ffmpeg: %s", _decode_log_line(line))
+    if debug and pending:
+        LOGGER.debug("ffmpeg: %s", _decode_log_line(pending))
+
+
+def _log_tail_lines(log_tail: bytearray) -> list[str]:
+    lines = (line.strip() for line in log_tail.decode("utf-8", "replace").splitlines())
+    return [line for line in lines if line][-FFMPEG_LOG_TAIL_LINES:]
+
+
+def _read_progress(fd: int, progress_callback) -> None:
+    # Read whole chunks and only surface the newest out_time_us per chunk; the
+    # other keys of each progress block are never used.
+    pending = b""
+    with open(fd, "rb", buffering=0) as progress:
+        while chunk := progress.read(PROGRESS_READ_SIZE):
+            *lines, pending = (pending + chunk).split(b"\n")
+            latest = None
+            for line in lines:
+                if line.startswith(b"out_time_us="):
+                    latest = line[12:]
+            if latest is None:
+                continue
+            try:
+                progress_callback(int(latest))
+            except ValueError:
+                continue
+
+
 def run_conversion(command: list[str], progress_callback) -> tuple[int, list[str]]:
+    # ffmpeg writes -progress to a dedicated pipe so its key=value stream never
+    # interleaves with the (much chattier) stderr log output.
+    read_fd, write_fd = os.pipe()
+    command = list(command)
+    command[command.index("-progress") + 1] = f"pipe:{write_fd}"
     LOGGER.info("Starting FFmpeg with command: %s", _loggable_command(command))
-    ffmpeg_logs: deque[str] = deque(maxlen=100)
-    process = subprocess.Popen(
-        command,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
+    log_tail = bytearray()
+    try:
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            pass_fds=(write_fd,),
+        )
+    except OSError:
+        os.close(read_fd)
+        raise
+    finally:
+        os.close(write_fd)
+    assert process.stderr is not None
+    log_reader = threading.Thread(
+        target=_collect_ffmpeg_logs, args=(process.stderr, log_tail), daemon=True
     )
-    assert process.stdout is not None
+    log_reader.start()
     try:
-        while True:
-            line = process.stdout.readline(STREAM_READER_LIMIT)
-            if line == "" and process.poll() is not None:
-                break
-            if not line:
-                continue
-            text_line = line.strip()
-            if text_line.startswith("out_time_ms="):
-                try:
-                    out_time_ms = int(text_line.split("=", 1)[1])
-                except ValueError:
-                    continue
-                progress_callback(out_time_ms)
-            else:
-                LOGGER.debug("ffmpeg: %s", text_line)
-                ffmpeg_logs.append(text_line)
+        _read_progress(read_fd, progress_callback)
     finally:
         return_code = process.wait()
-    return return_code, list(ffmpeg_logs)
+        log_reader.join()
+    return return_code, _log_tail_lines(log_tail)
 
 
 def _extract_duration(analysis: dict) -> float:
@@ -420,53 +730,60 @@ def _extract_duration(analysis: dict) -> float:
         return 0.0
 
 
-def _progress_callback_factory(
-    duration: float,
-    loop: asyncio.AbstractEventLoop,
+async def _publish_progress(
     client: httpx.AsyncClient,
     job_id: str,
-) -> tuple[callable, dict, dict]:
-    last_progress = {"value": 5}
-    last_update_ts = {"value": time.monotonic()}
-
-    def progress_callback(out_time_ms: int) -> None:
-        if duration <= 0:
+    duration: float,
+    progress: dict,
+    done: asyncio.Event,
+) -> None:
+    # The reader thread only overwrites progress["out_time_us"]; this task samples it
+    # once per interval. Setting ``done`` stops the loop after any in-flight POST, so a
+    # late progress update can never land after the terminal status.
+    last_progress = 5
+    while not done.is_set():
+        try:
+            await asyncio.wait_for(done.wait(), PROGRESS_INTERVAL)
             return
-        elapsed_seconds = out_time_ms / 1_000_000.0
+        except asyncio.TimeoutError:
+            pass
+        if duration <= 0:
+            continue
+        elapsed_seconds = progress["out_time_us"] / 1_000_000.0
         percentage = min(99, int((elapsed_seconds / duration) * 100))
-        now = time.monotonic()
-        if percentage <= last_progress["value"] or now - last_update_ts["value"] < 1:
-            return
-        last_progress["value"] = percentage
-        last_update_ts["value"] = now
-        loop.call_soon_threadsafe(
-            asyncio.create_task,
-            update_job_status(
-                client,
-                job_id,
-                "running",
-                percentage,
-                f"Encoded {elapsed_seconds:.1f}s",
-            ),
+        if percentage <= last_progress:
+            continue
+        last_progress = percentage
+        await update_job_status(
+            client,
+            job_id,
+            "running",
+            percentage,
+            f"Encoded {elapsed_seconds:.1f}s",
         )
 
-    return progress_callback, last_progress, last_update_ts
-
 
-async def claim_job(client: httpx.AsyncClient) -> dict | None:
+async def claim_jobs(client: httpx.AsyncClient, batch: int) -> list[dict]:
     try:
-        response = await client.get("/api/jobs/next")
+        response = await client.get("/api/jobs/next", params={"batch": batch, "wait": CLAIM_WAIT})
     except httpx.RequestError as exc:
-        LOGGER.error("HTTP error while claiming job: %s", exc)
-        return None
+        LOGGER.error("HTTP error while claiming jobs: %s", exc)
+        return []
     if response.status_code == 409:
         detail = response.json()
         LOGGER.warning("Job queue paused: %s", detail.get("reason") or detail.get("detail"))
-        return None
+        return []
     if response.status_code == 204:
-        return None
-    response.raise_for_status()
-    return response.json()
+        return []
+    try:
+        response.raise_for_status()
+    except httpx.HTTPStatusError as exc:
+        # A bad response must not end the claim loop; the next poll retries.
+        LOGGER.error("Orchestrator rejected job claim: %s", exc)
+        return []
+    claimed = response.json()
+    # Older orchestrators ignore ``batch`` and answer with a single job object.
+    return claimed if isinstance(claimed, list) else [claimed]
 
 
 async def update_job_status(
@@ -475,10 +792,13 @@ async def update_job_status(
     status: str,
     progress: int,
     message: str | None = None,
+    duration: float | None = None,
 ) -> None:
     payload = {"status": status, "progress": progress}
     if message:
         payload["message"] = message
+    if duration:
+        payload["duration"] = duration
     try:
         response = await client.post(f"/api/jobs/{job_id}/status", json=payload)
         response.raise_for_status()
@@ -495,17 +815,91 @@ async def _probe_duration(source: Path) -> float:
         return 0.0
 
 
-async def _validate_output(output: Path, expected_duration: float) -> bool:
-    if not output.exists():
+def _find_mp4_box(fh, box_type: bytes, start: int, end: int) -> tuple[int, int] | None:
+    offset = start
+    for _ in range(MP4_MAX_BOXES):
+        if offset + 8 > end:
+            return None
+        fh.seek(offset)
+        header = fh.read(16)
+        if len(header) < 8:
+            return None
+        size, kind = struct.unpack_from(">I4s", header)
+        payload = offset + 8
+        if size == 1:
+            if len(header) < 16:
+                return None
+            (size,) = struct.unpack_from(">Q", header, 8)
+            payload = offset + 16
+        elif size == 0:
+            size = end - offset
+        if size < payload - offset:
+            return None
+        if kind == box_type:
+            return payload, min(offset + size, end)
+        offset += size
+    return None
+
+
+def _read_mp4_duration(path: Path) -> float:
+    # Outputs are written with +faststart, so moov/mvhd sits right after ftyp and a few
+    # small reads replace an ffprobe run. 0.0 means "unknown"; callers fall back.
+    try:
+        with open(path, "rb") as fh:
+            end = os.fstat(fh.fileno()).st_size
+            moov = _find_mp4_box(fh, b"moov", 0, end)
+            mvhd = moov and _find_mp4_box(fh, b"mvhd", *moov)
+            if not mvhd:
+                return 0.0
+            fh.seek(mvhd[0])
+            header = fh.read(32)
+        if header[:1] == b"\x01":
+            timescale, duration = struct.unpack_from(">IQ", header, 20)
+        else:
+            timescale, duration = struct.unpack_from(">II", header, 12)
+    except (OSError, struct.error):
+        return 0.0
+    return duration / timescale if timescale else 0.0
+
+
+def _bitrate_to_bps(value: object) -> int:
+    normalized = str(value).strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(normalized[-1:], 1)
+    if multiplier != 1:
+        normalized = normalized[:-1]
+    try:
+        return int(float(normalized) * multiplier)
+    except ValueError:
+        return 0
+
+
+def _plausible_output_size(size: int, duration: float, encoding: dict) -> bool:
+    # Compare against the size the profile's bitrate cap implies for this duration.
+    video_bps = _bitrate_to_bps(encoding.get("max_bitrate", "8M"))
+    audio_bps = _bitrate_to_bps(encoding.get("audio", {}).get("bitrate", "192k"))
+    expected_bytes = (video_bps + audio_bps) * duration / 8
+    if expected_bytes <= 0:
         return False
+    return 0.1 * expected_bytes <= size <= 10 * expected_bytes
+
+
+async def _validate_output(
+    output: Path, expected_duration: float, encoding: dict | None = None
+) -> bool:
     try:
         stat = output.stat()
     except OSError:
         return False
     if stat.st_size <= 0:
         return False
+    # Only fresh encodes pass ``encoding``: ffmpeg just exited cleanly, so a size in
+    # line with the profile bitrate is enough and the ffprobe re-check is skipped.
+    if encoding and _plausible_output_size(stat.st_size, expected_duration, encoding):
+        return True
     if expected_duration > 0:
-        output_duration = await _probe_duration(output)
+        output_duration = await asyncio.to_thread(_read_mp4_duration, output)
+        if output_duration <= 0:
+            output_duration = await _probe_duration(output)
         if output_duration <= 0:
             return False
         if abs(output_duration - expected_duration) > 1.0:
@@ -519,16 +913,36 @@ async def _validate_output(output: Path, expected_duration: float) -> bool:
     return True
 
 
-def _build_output_path(source: Path) -> Path:
-    return source.parent / f"{source.stem}-chromecast.mp4"
+async def _validate_encoded_output(output: Path, duration: float, encoding: dict) -> bool:
+    # Removing the original needs the probed duration match, so that single check
+    # covers both; otherwise the size heuristic or the flag may skip the probe.
+    if REMOVE_ORIGINAL:
+        return await _validate_output(output, duration)
+    return await _validate_output(output, duration if VERIFY_OUTPUT_DURATION else 0.0, encoding)
+
+
+def _build_output_path(source: str) -> Path:
+    # One splitext on the job's path string, mirroring the orchestrator's _output_path,
+    # instead of deriving parent and stem through pathlib.
+    return Path(f"{os.path.splitext(source)[0]}-chromecast.mp4")
+
+
+def _finalize_output(partial_path: Path, output_path: Path, return_code: int) -> None:
+    # ffmpeg writes to a ".partial" name the scanner and Jellyfin ignore; only a clean
+    # exit moves it into place, so a half-written or crashed encode is never visible.
+    try:
+        if return_code == 0:
+            os.replace(partial_path, output_path)
+        else:
+            partial_path.unlink(missing_ok=True)
+    except OSError as exc:
+        LOGGER.warning("Unable to finalize output %s: %s", output_path, exc)
 
 
-async def _maybe_remove_original(source: Path, output_path: Path, expected_duration: float) -> bool:
+def _maybe_remove_original(source: Path, output_path: Path) -> bool:
+    # Callers only get here after _validate_output probed the output's duration.
     if not REMOVE_ORIGINAL:
         return False
-    if not await _validate_output(output_path, expected_duration):
-        LOGGER.warning("Keeping original %s because output did not validate", source)
-        return False
     try:
         source.unlink()
     except OSError as exc:
@@ -538,25 +952,34 @@ async def _maybe_remove_original(source: Path, output_path: Path, expected_durat
     return True
 
 
-async def process_job(client: httpx.AsyncClient, job: dict) -> None:
+async def process_job(client: httpx.AsyncClient, job: dict, gpu_id: int | None = None) -> None:
     job_id = job["id"]
     source = job["path"]
     LOGGER.info("Picked up job %s for %s", job_id[:8], source)
-    await update_job_status(client, job_id, "running", 5, "Allocated to GPU worker")
     playback_target = Path(source)
-    if not playback_target.exists():
+    # One stat both checks the source and keys the probe cache.
+    try:
+        source_stat = playback_target.stat()
+    except OSError:
         message = f"Source file not found: {source}"
         LOGGER.error("%s", message)
         await update_job_status(client, job_id, "failed", 0, message)
         return
 
-    analysis = await asyncio.to_thread(probe_file, playback_target)
+    output_path = _build_output_path(source)
+    # The status POST, the source probe and the cheap (duration-less) output check
+    # are independent, so overlap them instead of paying for each in turn.
+    _, analysis, output_present = await asyncio.gather(
+        update_job_status(client, job_id, "running", 5, "Allocated to GPU worker"),
+        asyncio.to_thread(probe_file, playback_target, source_stat),
+        _validate_output(output_path, 0.0),
+    )
     analysis = analysis or {}
-    duration = _extract_duration(analysis)
+    # The orchestrator keeps the duration an earlier attempt reported for this source.
+    duration = _extract_duration(analysis) or float(job.get("duration") or 0.0)
     if duration == 0:
         LOGGER.warning("Duration probe for %s returned 0 seconds", playback_target)
 
-    output_path = _build_output_path(playback_target)
     encoding = job.get("encoding") or PROFILES.get(job["profile"], {})
     if not encoding:
         LOGGER.warning(
@@ -567,11 +990,11 @@ async def process_job(client: httpx.AsyncClient, job: dict) -> None:
     analysis["encoding"] = encoding
     analysis["profile"] = job.get("profile")
 
-    if await _validate_output(output_path, duration):
+    if output_present and await _validate_output(output_path, duration):
         message = f"Output already present at {output_path}; skipping encode"
         await update_job_status(client, job_id, "completed", 100, message)
         LOGGER.info("Job %s completed from existing output %s", job_id[:8], output_path)
-        if await _maybe_remove_original(playback_target, output_path, duration):
+        if _maybe_remove_original(playback_target, output_path):
             await update_job_status(
                 client,
                 job_id,
@@ -581,28 +1004,36 @@ async def process_job(client: httpx.AsyncClient, job: dict) -> None:
             )
         return
 
-    command = build_ffmpeg_command(analysis, playback_target, output_path)
-
-    loop = asyncio.get_running_loop()
-    progress_callback, _, _ = _progress_callback_factory(duration, loop, client, job_id)
+    partial_path = output_path.with_name(f"{output_path.name}.partial")
+    command = build_ffmpeg_command(analysis, playback_target, partial_path, gpu_id)
 
-    return_code, ffmpeg_logs = await asyncio.to_thread(run_conversion, command, progress_callback)
+    progress = {"out_time_us": 0}
+    done = asyncio.Event()
+    publisher = asyncio.create_task(_publish_progress(client, job_id, duration, progress, done))
+    try:
+        return_code, ffmpeg_logs = await asyncio.to_thread(
+            run_conversion, command, functools.partial(progress.__setitem__, "out_time_us")
+        )
+    finally:
+        done.set()
+        await publisher
+    _finalize_output(partial_path, output_path, return_code)
 
     if return_code == 0:
         message = f"Encoding finished to {output_path}"
-        if not await _validate_output(output_path, duration):
+        if not await _validate_encoded_output(output_path, duration, encoding):
             await update_job_status(
                 client,
                 job_id,
                 "failed",
                 0,
                 f"Encoding finished but output missing or invalid at {output_path}",
+                duration=duration,
             )
             return
-        removed = await _maybe_remove_original(playback_target, output_path, duration)
-        if removed:
+        if _maybe_remove_original(playback_target, output_path):
             message = f"{message} (original removed)"
-        await update_job_status(client, job_id, "completed", 100, message)
+        await update_job_status(client, job_id, "completed", 100, message, duration=duration)
         LOGGER.info("Job %s completed, output: %s", job_id[:8], output_path)
     else:
         message = f"FFmpeg exited with code {return_code}"
@@ -614,30 +1045,83 @@ async def process_job(client: httpx.AsyncClient, job: dict) -> None:
                 "\n".join(ffmpeg_logs),
             )
             message = f"{message}; last log line: {ffmpeg_logs[-1]}"
-        await update_job_status(client, job_id, "failed", 0, message)
+        await update_job_status(client, job_id, "failed", 0, message, duration=duration)
+
+
+async def _claim_jobs(
+    client: httpx.AsyncClient, jobs_queue: asyncio.Queue, idle_encoders: asyncio.Semaphore
+) -> None:
+    interval = POLL_MIN_INTERVAL
+    while True:
+        # The orchestrator marks claimed jobs running, so only claim for encoders that
+        # can start right away; a job held in reserve here would be stranded if the
+        # worker went down. Wait for one idle encoder, then take every other idle one
+        # so they are all fed by a single round trip.
+        await idle_encoders.acquire()
+        batch = 1
+        while batch < MAX_CLAIM_BATCH and not idle_encoders.locked():
+            await idle_encoders.acquire()
+            batch += 1
+        jobs = await claim_jobs(client, batch)
+        for _ in range(batch - len(jobs)):
+            idle_encoders.release()
+        if not jobs:
+            LOGGER.debug("No job available; sleeping for %.2fs", interval)
+            await asyncio.sleep(interval)
+            interval = min(interval * POLL_BACKOFF, POLL_INTERVAL)
+            continue
+        interval = max(interval * POLL_SPEEDUP, POLL_MIN_INTERVAL)
+        for job in jobs:
+            jobs_queue.put_nowait(job)
+
+
+async def _process_jobs(
+    client: httpx.AsyncClient,
+    jobs_queue: asyncio.Queue,
+    idle_encoders: asyncio.Semaphore,
+    gpu_id: int | None,
+) -> None:
+    while True:
+        job = await jobs_queue.get()
+        try:
+            await process_job(client, job, gpu_id)
+        except Exception as exc:  # noqa: BLE001
+            LOGGER.exception("Job %s failed: %s", job["id"][:8], exc)
+            await update_job_status(client, job["id"], "failed", 0, str(exc))
+        finally:
+            idle_encoders.release()
 
 
 async def main() -> None:
     LOGGER.info(
-        "GPU worker starting; polling %s every %ss (log level %s)",
+        "GPU worker starting; polling %s every %s-%ss with %s encode slot(s) on %s GPU(s) "
+        "(log level %s)",
         ORCHESTRATOR_URL,
+        POLL_MIN_INTERVAL,
         POLL_INTERVAL,
+        MAX_CONCURRENT_JOBS,
+        GPU_COUNT,
         LOG_LEVEL,
     )
-    async with httpx.AsyncClient(base_url=ORCHESTRATOR_URL, timeout=30.0) as client:
-        while True:
-            job = await claim_job(client)
-            if not job:
-                LOGGER.debug("No job available; sleeping for %ss", POLL_INTERVAL)
-                await asyncio.sleep(POLL_INTERVAL)
-                continue
-            try:
-                await process_job(client, job)
-            except Exception as exc:  # noqa: BLE001
-                LOGGER.exception("Job %s failed: %s", job["id"][:8], exc)
-                await update_job_status(client, job["id"], "failed", 0, str(exc))
-            await asyncio.sleep(1)
+    async with httpx.AsyncClient(
+        base_url=ORCHESTRATOR_URL, timeout=ORCHESTRATOR_TIMEOUT, limits=ORCHESTRATOR_LIMITS
+    ) as client:
+        jobs_queue: asyncio.Queue = asyncio.Queue(maxsize=MAX_CONCURRENT_JOBS)
+        idle_encoders = asyncio.Semaphore(MAX_CONCURRENT_JOBS)
+        # Encode slots are spread round-robin over the GPUs; a single GPU keeps
+        # ffmpeg's default device selection.
+        await asyncio.gather(
+            _claim_jobs(client, jobs_queue, idle_encoders),
+            *(
+                _process_jobs(
+                    client, jobs_queue, idle_encoders, slot % GPU_COUNT if GPU_COUNT > 1 else None
+                )
+                for slot in range(MAX_CONCURRENT_JOBS)
+            ),
+        )
 
 
 if __name__ == "__main__":
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
     asyncio.run(main())
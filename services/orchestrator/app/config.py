@@ -10,8 +10,20 @@ from typing import Dict, Optional
 import yaml
 from pydantic import BaseModel, Field, ValidationError, model_validator
 
+try:
+    from yaml import CSafeDumper as YamlDumper
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeDumper as YamlDumper
+    from yaml import SafeLoader as YamlLoader
+
 LOGGER = logging.getLogger("orchestrator.config")
 
+_BITRATE_MULTIPLIERS = {"k": 1_000, "m": 1_000_000}
+_ALLOWED_PROFILES = frozenset({"baseline", "main", "high"})
+_ALLOWED_PRESETS = frozenset({"p1", "p2", "p3", "p4", "p5", "p6", "p7"})
+_ALLOWED_RC_MODES = frozenset({"vbr_hq", "vbr", "cbr"})
+
 
 def _validate_codecs(codec: str, audio_codec: str) -> None:
     if codec.lower() != "h264":
@@ -21,8 +33,7 @@ def _validate_codecs(codec: str, audio_codec: str) -> None:
 
 
 def _validate_profile(profile: str, level: str) -> None:
-    allowed_profiles = {"baseline", "main", "high"}
-    if profile.lower() not in allowed_profiles:
+    if profile.lower() not in _ALLOWED_PROFILES:
         raise ValueError("Chromecast Gen 2 only supports H.264 baseline, main, or high profiles.")
 
     try:
@@ -44,12 +55,13 @@ def _validate_resolution(resolution: str) -> None:
 
 
 def _bitrate_to_int(value: str) -> int:
+    # float() parses the number so every format it accepts (e.g. "8.", "+8M", "1e6")
+    # stays valid; only the unit suffix is handled here.
     normalized = value.strip().lower()
-    if normalized.endswith("k"):
-        return int(float(normalized[:-1]) * 1_000)
-    if normalized.endswith("m"):
-        return int(float(normalized[:-1]) * 1_000_000)
-    return int(float(normalized))
+    multiplier = _BITRATE_MULTIPLIERS.get(normalized[-1:], 1)
+    if multiplier != 1:
+        normalized = normalized[:-1]
+    return int(float(normalized) * multiplier)
 
 
 def _validate_bitrates(max_bitrate: str, bufsize: str, audio_bitrate: str) -> None:
@@ -71,8 +83,7 @@ def _validate_bitrates(max_bitrate: str, bufsize: str, audio_bitrate: str) -> No
 def _validate_encoding_options(
     preset: str, cq: int, rc_mode: str, max_fps: int, audio_channels: int
 ) -> None:
-    allowed_presets = {"p1", "p2", "p3", "p4", "p5", "p6", "p7"}
-    if preset.lower() not in allowed_presets:
+    if preset.lower() not in _ALLOWED_PRESETS:
         raise ValueError("NVENC preset must be one of p1–p7 for Chromecast-safe outputs.")
 
     if cq < 0 or cq > 30:
@@ -80,8 +91,7 @@ def _validate_encoding_options(
             "NVENC CQ must be between 0 and 30 for stable quality on Gen 2 Chromecasts."
         )
 
-    allowed_rc_modes = {"vbr_hq", "vbr", "cbr"}
-    if rc_mode.lower() not in allowed_rc_modes:
+    if rc_mode.lower() not in _ALLOWED_RC_MODES:
         raise ValueError(
             "Rate control must be one of vbr_hq, vbr, or cbr for Chromecast-safe outputs."
         )
@@ -120,13 +130,14 @@ class Profile(BaseModel):
 
     @model_validator(mode="after")
     def validate_codecs(cls, values):
+        # Cheapest checks first: equality and set lookups reject before any regex parsing.
         _validate_codecs(values.codec, values.audio.codec)
-        _validate_profile(values.profile, values.level)
-        _validate_resolution(values.resolution)
-        _validate_bitrates(values.max_bitrate, values.bufsize, values.audio.bitrate)
         _validate_encoding_options(
             values.preset, values.cq, values.rc, values.max_fps, values.audio.channels
         )
+        _validate_profile(values.profile, values.level)
+        _validate_resolution(values.resolution)
+        _validate_bitrates(values.max_bitrate, values.bufsize, values.audio.bitrate)
         return values
 
 
@@ -141,6 +152,7 @@ class OperationConfig(BaseModel):
     gpu_temperature_cutoff: int
     max_disk_usage_percent: int
     remove_original_after_success: bool = False
+    verify_output_duration: bool = True
 
 
 class JellyfinConfig(BaseModel):
@@ -178,20 +190,30 @@ class QualityConfig(BaseModel):
 class ConfigSource:
     path: Path
     config: QualityConfig
+    # Set by in-memory edits; flush_config writes them out in one rewrite.
+    dirty: bool = False
 
 
 def update_profile(config_source: ConfigSource, name: str, data: dict) -> Profile:
     profile = Profile(**data)
     config_source.config.profiles[name] = profile
     LOGGER.info("Updated encoding profile '%s' for Chromecast-safe settings.", name)
-    persist_config(config_source)
+    config_source.dirty = True
     return profile
 
 
+def flush_config(source: ConfigSource) -> None:
+    if source.dirty:
+        persist_config(source)
+
+
 def load_config(path: Path) -> ConfigSource:
-    if not path.exists():
-        raise FileNotFoundError(f"Quality config not found at {path}")
-    raw = yaml.safe_load(path.read_text())
+    # libyaml reads and decodes the byte stream itself; no intermediate str copy.
+    try:
+        with path.open("rb") as fh:
+            raw = yaml.load(fh, Loader=YamlLoader)
+    except FileNotFoundError as exc:
+        raise FileNotFoundError(f"Quality config not found at {path}") from exc
     try:
         config = QualityConfig(**raw)
     except ValidationError as exc:
@@ -203,15 +225,18 @@ def load_config(path: Path) -> ConfigSource:
         len(config.libraries),
         len(config.profiles),
     )
-    LOGGER.debug(json.dumps(raw, indent=2))
+    if LOGGER.isEnabledFor(logging.DEBUG):
+        # Arguments are evaluated before the level check, so skip the dump explicitly.
+        LOGGER.debug(json.dumps(raw, indent=2))
     return ConfigSource(path=path, config=config)
 
 
 def persist_config(source: ConfigSource) -> None:
     payload = source.config.model_dump()
     try:
-        serialized = yaml.safe_dump(payload, sort_keys=False)
+        serialized = yaml.dump(payload, Dumper=YamlDumper, sort_keys=False)
         source.path.write_text(serialized, encoding="utf-8")
+        source.dirty = False
         LOGGER.info("Persisted settings to %s", source.path)
     except OSError as exc:
         if exc.errno == errno.EROFS:
@@ -220,6 +245,7 @@ def persist_config(source: ConfigSource) -> None:
                 source.path,
                 exc,
             )
+            source.dirty = False
             return
         LOGGER.error("Failed to persist settings to %s: %s", source.path, exc)
         raise
@@ -2,22 +2,54 @@
 
 import asyncio
 import logging
+from typing import Optional
 
 import httpx
 
 LOGGER = logging.getLogger("orchestrator.jellyfin")
 
+# Jellyfin queues library scans on a single scheduler, so a burst of refresh requests
+# mostly waits (or gets rate-limited); keep only a few in flight.
+MAX_CONCURRENT_REFRESHES = 4
+
+# Shared so refreshes for several libraries reuse kept-alive connections instead of
+# reconnecting (and re-handshaking TLS) per library.
+_CLIENT: Optional[httpx.AsyncClient] = None
+
+
+def _client() -> httpx.AsyncClient:
+    global _CLIENT
+    if _CLIENT is None or _CLIENT.is_closed:
+        _CLIENT = httpx.AsyncClient(timeout=10.0, limits=httpx.Limits(max_keepalive_connections=16))
+    return _CLIENT
+
+
+async def aclose() -> None:
+    global _CLIENT
+    if _CLIENT is not None:
+        await _CLIENT.aclose()
+        _CLIENT = None
+
 
 async def trigger_scan(base_url: str, api_key: str, library_id: int) -> None:
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        headers = {"X-Emby-Token": api_key}
-        scan_url = f"{base_url}/Library/Refresh?LibraryId={library_id}"
-        LOGGER.info("Requesting Jellyfin refresh for library %s", library_id)
-        response = await client.post(scan_url, headers=headers)
-        response.raise_for_status()
+    headers = {"X-Emby-Token": api_key}
+    scan_url = f"{base_url}/Library/Refresh?LibraryId={library_id}"
+    LOGGER.info("Requesting Jellyfin refresh for library %s", library_id)
+    response = await _client().post(scan_url, headers=headers)
+    response.raise_for_status()
+
+
+async def _limited_trigger_scan(
+    semaphore: asyncio.Semaphore, base_url: str, api_key: str, library_id: int
+) -> None:
+    async with semaphore:
+        await trigger_scan(base_url, api_key, library_id)
 
 
 async def trigger_all(config: dict[str, int], base_url: str, api_key: str) -> None:
-    tasks = [trigger_scan(base_url, api_key, lib_id) for lib_id in config.values()]
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REFRESHES)
+    tasks = [
+        _limited_trigger_scan(semaphore, base_url, api_key, lib_id) for lib_id in config.values()
+    ]
     if tasks:
         await asyncio.gather(*tasks)
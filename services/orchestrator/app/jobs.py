@@ -1,13 +1,20 @@
 from __future__ import annotations
 
 import asyncio
+import itertools
 import logging
+import os
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Set
 from uuid import uuid4
 
-from pydantic import BaseModel, Field
+# Scans with at least this many unchecked files stat their outputs from a thread pool.
+SCAN_PARALLEL_THRESHOLD = 64
+SCAN_STAT_WORKERS = 8
 
 
 class JobStatus(str):
@@ -17,53 +24,83 @@ class JobStatus(str):
     FAILED = "failed"
 
 
-class Job(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid4()))
+# Jobs are internal, trusted objects mutated on every status change, so they are plain
+# slotted dataclasses; request payloads are validated by the pydantic models in main.
+@dataclass(slots=True, kw_only=True)
+class Job:
     path: str
     library: str
     profile: str
+    id: str = field(default_factory=lambda: str(uuid4()))
     encoding: Optional[Dict[str, Any]] = None
     status: str = JobStatus.PENDING
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    updated_at: datetime = field(default_factory=datetime.utcnow)
     progress: int = 0
     message: Optional[str] = None
+    duration: Optional[float] = None
 
-    class Config:
-        json_encoders = {datetime: lambda value: value.isoformat()}
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "path": self.path,
+            "library": self.library,
+            "profile": self.profile,
+            "encoding": self.encoding,
+            "status": self.status,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+            "progress": self.progress,
+            "message": self.message,
+            "duration": self.duration,
+        }
 
 
-class JobStatusUpdate(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class JobStatusUpdate:
     status: str
     progress: Optional[int] = None
     message: Optional[str] = None
+    duration: Optional[float] = None
 
 
 class JobManager:
     def __init__(self) -> None:
         self._logger = logging.getLogger(__name__)
         self._jobs: Dict[str, Job] = {}
+        # Newest job id per source path, so duplicate checks avoid scanning every job.
+        self._jobs_by_path: Dict[str, str] = {}
+        # FIFO of job ids that may still be pending; ``_jobs`` stays the source of truth.
+        self._pending: deque[str] = deque()
+        # Set while ``_pending`` may hold work, so long-polling claims wake on new jobs.
+        self._jobs_queued = asyncio.Event()
         self._lock = asyncio.Lock()
         self._video_extensions = {".mp4", ".m4v", ".mov", ".mkv", ".ts", ".flv"}
+        self._video_suffixes = tuple(self._video_extensions)
 
         self._paused: bool = False
         self._pause_reason: Optional[str] = None
 
-    def _output_path(self, source: Path) -> Path:
-        return source.parent / f"{source.stem}-chromecast.mp4"
+    def _output_path(self, source: str) -> str:
+        # Plain string handling: scans call this for every candidate, so skip Path parsing.
+        return f"{os.path.splitext(source)[0]}-chromecast.mp4"
 
-    def _already_converted(self, source: Path) -> bool:
+    def _already_converted(self, source: str) -> bool:
         output_path = self._output_path(source)
-        if not output_path.exists():
-            return False
+        # Most sources have no output yet, so that single stat usually settles it.
         try:
-            output_stat = output_path.stat()
-            source_mtime = source.stat().st_mtime
+            output_stat = os.stat(output_path)
+        except FileNotFoundError:
+            return False
         except OSError:
             return True
         if output_stat.st_size == 0:
             return False
-        if output_stat.st_mtime >= source_mtime:
+        try:
+            source_stat = os.stat(source)
+        except OSError:
+            return True
+        if output_stat.st_mtime_ns >= source_stat.st_mtime_ns:
             self._logger.info(
                 "Skipping already converted file %s (output: %s)", source, output_path
             )
@@ -82,34 +119,93 @@ class JobManager:
             raise ValueError("Unsupported media extension")
         if "-chromecast" in source.stem.lower():
             raise ValueError("Converted outputs are ignored")
-        if self._already_converted(source):
+        if self._already_converted(path):
             raise ValueError(f"Output already exists for {path}")
+        return await self._add_job_unchecked(path, library, profile, encoding)
+
+    async def _add_job_unchecked(
+        self,
+        path: str,
+        library: str,
+        profile: str,
+        encoding: Optional[Dict[str, Any]] = None,
+    ) -> Job:
+        jobs_added = await self._add_jobs_unchecked([path], library, profile, encoding)
+        return jobs_added[0]
+
+    async def _add_jobs_unchecked(
+        self,
+        paths: List[str],
+        library: str,
+        profile: str,
+        encoding: Optional[Dict[str, Any]] = None,
+    ) -> List[Job]:
+        # Callers have already applied add_job's extension/output checks. A whole scan's
+        # candidates are queued under one lock acquisition.
         async with self._lock:
-            for job in self._jobs.values():
-                if job.path == path and job.status != JobStatus.FAILED:
-                    self._logger.debug("Job already tracked for %s", path)
-                    return job
-            job = Job(path=path, library=library, profile=profile, encoding=encoding)
-            self._jobs[job.id] = job
-            self._logger.info(
-                "Queued job %s for %s (library=%s, profile=%s)",
-                job.id[:8],
-                path,
-                library,
-                profile,
-            )
-            return job
+            # One clock read for every timestamp; these jobs are created and updated at once.
+            now = datetime.utcnow()
+            return [self._queue_job(path, library, profile, encoding, now) for path in paths]
+
+    def _queue_job(
+        self,
+        path: str,
+        library: str,
+        profile: str,
+        encoding: Optional[Dict[str, Any]],
+        now: datetime,
+    ) -> Job:
+        duration: Optional[float] = None
+        existing = self._jobs.get(self._jobs_by_path.get(path, ""))
+        if existing is not None:
+            if existing.status != JobStatus.FAILED:
+                self._logger.debug("Job already tracked for %s", path)
+                return existing
+            # Retries reuse the duration a worker already probed for this source.
+            duration = existing.duration
+        job = Job(
+            path=path,
+            library=library,
+            profile=profile,
+            encoding=encoding,
+            created_at=now,
+            updated_at=now,
+            duration=duration,
+        )
+        self._jobs[job.id] = job
+        self._jobs_by_path[path] = job.id
+        self._pending.append(job.id)
+        self._jobs_queued.set()
+        self._logger.info(
+            "Queued job %s for %s (library=%s, profile=%s)",
+            job.id[:8],
+            path,
+            library,
+            profile,
+        )
+        return job
+
+    async def list_jobs(self, offset: int = 0, limit: Optional[int] = None) -> List[Job]:
+        async with self._lock:
+            stop = None if limit is None else offset + limit
+            return list(itertools.islice(self._jobs.values(), offset, stop))
 
-    async def list_jobs(self) -> List[Job]:
+    async def count_jobs(self) -> int:
         async with self._lock:
-            return list(self._jobs.values())
+            return len(self._jobs)
 
-    async def acquire_next(self) -> Optional[Job]:
+    async def count_by_status(self) -> Dict[str, int]:
+        async with self._lock:
+            return dict(Counter(job.status for job in self._jobs.values()))
+
+    async def acquire_batch(self, limit: int) -> List[Job]:
+        acquired: List[Job] = []
         async with self._lock:
             if self._paused:
-                return None
-            for job in self._jobs.values():
-                if job.status == JobStatus.PENDING:
+                return acquired
+            while self._pending and len(acquired) < limit:
+                job = self._jobs.get(self._pending.popleft())
+                if job is not None and job.status == JobStatus.PENDING:
                     job.status = JobStatus.RUNNING
                     job.updated_at = datetime.utcnow()
                     self._logger.info(
@@ -118,8 +214,16 @@ class JobManager:
                         job.path,
                         job.library,
                     )
-                    return job
-            return None
+                    acquired.append(job)
+            if not self._pending:
+                self._jobs_queued.clear()
+            return acquired
+
+    async def wait_for_jobs(self, timeout: float) -> None:
+        try:
+            await asyncio.wait_for(self._jobs_queued.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
 
     async def queue_state(self) -> Dict[str, object]:
         async with self._lock:
@@ -142,11 +246,16 @@ class JobManager:
             job = self._jobs.get(job_id)
             if job is None:
                 raise KeyError(job_id)
+            if update.status == JobStatus.PENDING and job.status != JobStatus.PENDING:
+                self._pending.append(job_id)
+                self._jobs_queued.set()
             job.status = update.status
             if update.progress is not None:
                 job.progress = update.progress
             if update.message:
                 job.message = update.message
+            if update.duration is not None:
+                job.duration = update.duration
             job.updated_at = datetime.utcnow()
             self._logger.debug(
                 "Job %s updated: status=%s progress=%s message=%s",
@@ -157,6 +266,52 @@ class JobManager:
             )
             return job
 
+    def _iter_video_files(self, root: str) -> Iterator[str]:
+        # Iterative scandir walk: names are filtered before any Path is built, and
+        # DirEntry type checks reuse the d_type readdir already returned.
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                            continue
+                        name = entry.name.lower()
+                        if not name.endswith(self._video_suffixes) or "-chromecast" in name:
+                            continue
+                        if entry.is_file():
+                            yield entry.path
+            except OSError as exc:
+                self._logger.warning("Skipping unreadable directory %s: %s", directory, exc)
+
+    async def _tracked_paths(self) -> Set[str]:
+        # Paths with a live (non-failed) job: add_job would return that job anyway, so a
+        # rescan doesn't need to stat their outputs.
+        async with self._lock:
+            return {
+                path
+                for path, job_id in self._jobs_by_path.items()
+                if self._jobs[job_id].status != JobStatus.FAILED
+            }
+
+    def _unconverted(self, paths: List[str]) -> List[str]:
+        return [path for path in paths if not self._already_converted(path)]
+
+    def _scan_candidates(self, root_path: Path, tracked: Set[str]) -> List[str]:
+        if not root_path.is_dir():
+            return []
+        paths = [path for path in self._iter_video_files(str(root_path)) if path not in tracked]
+        if len(paths) < SCAN_PARALLEL_THRESHOLD:
+            return self._unconverted(paths)
+        # Output stats are I/O bound (libraries are often network mounts), so large scans
+        # check contiguous slices in parallel; slicing keeps the walk order.
+        size = -(-len(paths) // SCAN_STAT_WORKERS)
+        slices = [paths[start : start + size] for start in range(0, len(paths), size)]
+        with ThreadPoolExecutor(max_workers=len(slices)) as pool:
+            return [path for chunk in pool.map(self._unconverted, slices) for path in chunk]
+
     async def scan_directory(
         self,
         library: str,
@@ -165,19 +320,10 @@ class JobManager:
         encoding: Optional[Dict[str, Any]] = None,
     ) -> List[Job]:
         root_path = Path(root)
-        if not root_path.exists():
-            return []
-        jobs_added: List[Job] = []
-        entries = list(root_path.rglob("*.*"))
-        for entry in entries:
-            if entry.suffix.lower() not in self._video_extensions:
-                continue
-            if "-chromecast" in entry.stem.lower():
-                continue
-            if self._already_converted(entry):
-                continue
-            job = await self.add_job(str(entry), library, profile, encoding=encoding)
-            jobs_added.append(job)
+        # Walking and stat-ing the tree blocks, so keep it off the event loop.
+        tracked = await self._tracked_paths()
+        candidates = await asyncio.to_thread(self._scan_candidates, root_path, tracked)
+        jobs_added = await self._add_jobs_unchecked(candidates, library, profile, encoding)
         self._logger.info(
             "Scan complete for %s: %s jobs queued (root=%s)",
             library,
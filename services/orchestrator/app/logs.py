@@ -1,15 +1,63 @@
 from __future__ import annotations
 
 import logging
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from threading import RLock
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Set
 
 VERBOSE_LEVEL_NAME = "VERBOSE"
 logging.addLevelName(logging.DEBUG, VERBOSE_LEVEL_NAME)
+LOG_WRITE_BATCH_SIZE = 500
+_LOG_SENTINEL = None
+_CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+    "PRAGMA mmap_size=268435456",
+)
+_CREATE_LOGS_SQL = """
+    CREATE TABLE IF NOT EXISTS logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp REAL NOT NULL,
+        level INTEGER NOT NULL,
+        logger_id INTEGER NOT NULL REFERENCES loggers(id),
+        message TEXT NOT NULL
+    )
+"""
+_INSERT_SQL = "INSERT INTO logs(timestamp, level, logger_id, message) VALUES (?, ?, ?, ?)"
+_SEARCH_INDEX_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS logs_ai AFTER INSERT ON logs BEGIN
+        INSERT INTO logs_fts(rowid, message) VALUES (new.id, new.message);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS logs_ad AFTER DELETE ON logs BEGIN
+        INSERT INTO logs_fts(logs_fts, rowid, message) VALUES ('delete', old.id, old.message);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS logs_au AFTER UPDATE ON logs BEGIN
+        INSERT INTO logs_fts(logs_fts, rowid, message) VALUES ('delete', old.id, old.message);
+        INSERT INTO logs_fts(rowid, message) VALUES (new.id, new.message);
+    END
+    """,
+)
+_LEVEL_NAMES = {
+    logging.DEBUG: VERBOSE_LEVEL_NAME,
+    logging.INFO: "INFO",
+    logging.WARNING: "WARNING",
+    logging.ERROR: "ERROR",
+    logging.CRITICAL: "CRITICAL",
+}
+# Only used to render tracebacks; timestamp, level and logger are stored in their own columns.
+_TRACEBACK_FORMATTER = logging.Formatter()
 
 
 def _normalize_level(level: str) -> str:
@@ -19,18 +67,65 @@ def _normalize_level(level: str) -> str:
     return normalized
 
 
+def _level_number(level: str) -> Optional[int]:
+    # VERBOSE is registered for DEBUG's number, so both names resolve to 10.
+    number = logging.getLevelName(level.upper())
+    return number if isinstance(number, int) else None
+
+
+def _level_name(number: int) -> str:
+    name = _LEVEL_NAMES.get(number)
+    return name if name is not None else _normalize_level(logging.getLevelName(number))
+
+
+def _stored_level(entry: LogEntry) -> int:
+    # Records carry their numeric level; a name is only resolved when that is missing.
+    if entry.levelno is not None:
+        return entry.levelno
+    return _named_level(entry.level)
+
+
+def _named_level(level: str) -> int:
+    # Unknown names are kept as NOTSET rather than filed under a real level, so no level
+    # filter claims them.
+    number = _level_number(level)
+    return logging.NOTSET if number is None else number
+
+
+def _record_message(record: logging.LogRecord) -> str:
+    message = record.getMessage()
+    if record.exc_info and not record.exc_text:
+        # Cached on the record so other handlers don't render the traceback again.
+        record.exc_text = _TRACEBACK_FORMATTER.formatException(record.exc_info)
+    if record.exc_text:
+        message = f"{message}\n{record.exc_text}"
+    if record.stack_info:
+        message = f"{message}\n{record.stack_info}"
+    return message
+
+
 def _ensure_utc(timestamp: datetime) -> datetime:
+    if timestamp.tzinfo is timezone.utc:
+        return timestamp
     if timestamp.tzinfo is None:
         return timestamp.replace(tzinfo=timezone.utc)
     return timestamp.astimezone(timezone.utc)
 
 
+def _epoch_seconds(timestamp: datetime) -> float:
+    # Aware datetimes convert directly; only naive ones need the UTC assumption applied.
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+
 @dataclass
 class LogEntry:
     timestamp: datetime
     level: str
     logger: str
     message: str
+    levelno: Optional[int] = None
 
     def to_dict(self) -> dict:
         return {
@@ -46,50 +141,152 @@ class LogStore:
         self.path = path
         self.retention_days = retention_days
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        self._lock = RLock()
-        self._conn = sqlite3.connect(self.path, check_same_thread=False)
-        self._conn.row_factory = sqlite3.Row
+        # Guards the writer connection; reads use per-thread read-only connections so
+        # /api/logs requests don't queue behind log writes (WAL lets both run at once).
+        self._lock = threading.Lock()
+        self._readers = threading.local()
+        self._in_memory = str(self.path) == ":memory:"
+        self._logger_ids: Dict[str, int] = {}
+        # Autocommit mode: the only multi-statement transaction is the explicit BEGIN in
+        # add_entries, so the sqlite3 module never issues implicit BEGINs of its own.
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
         self._initialize()
 
     def _initialize(self) -> None:
         with self._lock:
+            if not self._in_memory:
+                # WAL lets readers run alongside the writer; with WAL, synchronous=NORMAL only
+                # syncs at checkpoints yet stays consistent after a crash.
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            for pragma in _CONNECTION_PRAGMAS:
+                self._conn.execute(pragma)
+            # Rows store the numeric level and an interned logger id instead of two strings,
+            # which keeps both the table and its indexes small.
             self._conn.execute(
                 """
-                CREATE TABLE IF NOT EXISTS logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp REAL NOT NULL,
-                    level TEXT NOT NULL,
-                    logger TEXT NOT NULL,
-                    message TEXT NOT NULL
+                CREATE TABLE IF NOT EXISTS loggers (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL UNIQUE
                 )
                 """
             )
+            self._migrate_text_columns()
+            self._conn.execute(_CREATE_LOGS_SQL)
             self._conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_level ON logs(level)")
-            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_logger ON logs(logger)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_logger ON logs(logger_id)")
             self._conn.execute("CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON logs(timestamp)")
-            self._conn.commit()
-            self._prune_expired()
+            self._search_index = self._initialize_search_index()
+        # Outside the block above: the lock is not reentrant.
+        self.prune_expired()
 
-    def _prune_expired(self) -> None:
+    def _migrate_text_columns(self) -> None:
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(logs)")}
+        if "logger" not in columns:
+            return
+        # Databases from before interning: copy rows over, keeping their ids so the search
+        # index still points at the right messages.
+        self._conn.create_function("stored_level", 1, _named_level, deterministic=True)
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.execute("ALTER TABLE logs RENAME TO logs_text")
+            self._conn.execute(_CREATE_LOGS_SQL)
+            self._conn.execute(
+                "INSERT OR IGNORE INTO loggers(name) SELECT DISTINCT logger FROM logs_text"
+            )
+            self._conn.execute(
+                """
+                INSERT INTO logs(id, timestamp, level, logger_id, message)
+                SELECT logs_text.id, timestamp, stored_level(level), loggers.id, message
+                FROM logs_text JOIN loggers ON loggers.name = logs_text.logger
+                """
+            )
+            self._conn.execute("DROP TABLE logs_text")
+
+    def _initialize_search_index(self) -> bool:
+        # A trigram FTS5 index answers substring searches without scanning every message;
+        # triggers keep it in step with inserts and pruning.
+        exists = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'logs_fts'"
+        ).fetchone()
+        try:
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5("
+                "message, content='logs', content_rowid='id', tokenize='trigram')"
+            )
+        except sqlite3.OperationalError as exc:
+            logging.getLogger(__name__).warning(
+                "SQLite lacks FTS5 trigram support; log search will scan messages: %s", exc
+            )
+            return False
+        for trigger in _SEARCH_INDEX_TRIGGERS:
+            self._conn.execute(trigger)
+        if not exists:
+            self._conn.execute("INSERT INTO logs_fts(logs_fts) VALUES ('rebuild')")
+        return True
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        if self._in_memory:
+            # Every connection to ":memory:" is a separate database; share the writer.
+            with self._lock:
+                yield self._conn
+            return
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None)
+            for pragma in _CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            conn.execute("PRAGMA query_only=1")
+            self._readers.conn = conn
+        yield conn
+
+    def prune_expired(self) -> None:
         cutoff = datetime.now(timezone.utc) - timedelta(days=self.retention_days)
         with self._lock:
             self._conn.execute("DELETE FROM logs WHERE timestamp < ?", (cutoff.timestamp(),))
-            self._conn.commit()
+            # Keeps the loggers table equal to the categories that still have entries.
+            orphaned = self._conn.execute(
+                "DELETE FROM loggers"
+                " WHERE NOT EXISTS (SELECT 1 FROM logs WHERE logs.logger_id = loggers.id)"
+            ).rowcount
+            if orphaned:
+                self._logger_ids.clear()
 
     def update_retention(self, retention_days: int) -> None:
         self.retention_days = retention_days
-        self._prune_expired()
+        self.prune_expired()
 
     def add_entry(self, entry: LogEntry) -> None:
-        utc_timestamp = _ensure_utc(entry.timestamp)
-        normalized_level = _normalize_level(entry.level)
+        self.add_entries((entry,))
+
+    def add_entries(self, entries: Iterable[LogEntry]) -> int:
+        entries = list(entries)
+        if not entries:
+            return 0
         with self._lock:
-            self._conn.execute(
-                "INSERT INTO logs(timestamp, level, logger, message) VALUES (?, ?, ?, ?)",
-                (utc_timestamp.timestamp(), normalized_level, entry.logger, entry.message),
-            )
-            self._conn.commit()
-        self._prune_expired()
+            # Resolved before BEGIN so a rolled-back batch can't leave stale cached ids.
+            logger_ids = self._logger_ids_for({entry.logger for entry in entries})
+            rows = [
+                (
+                    _epoch_seconds(entry.timestamp),
+                    _stored_level(entry),
+                    logger_ids[entry.logger],
+                    entry.message,
+                )
+                for entry in entries
+            ]
+            # One transaction (and one sync) for the whole batch instead of one per row.
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(_INSERT_SQL, rows)
+        return len(rows)
+
+    def _logger_ids_for(self, names: Set[str]) -> Dict[str, int]:
+        for name in names - self._logger_ids.keys():
+            self._conn.execute("INSERT OR IGNORE INTO loggers(name) VALUES (?)", (name,))
+            row = self._conn.execute("SELECT id FROM loggers WHERE name = ?", (name,)).fetchone()
+            self._logger_ids[name] = row[0]
+        return self._logger_ids
 
     def _filter_query(
         self,
@@ -97,27 +294,38 @@ class LogStore:
         level: Optional[str] = None,
         query: Optional[str] = None,
         logger_name: Optional[str] = None,
+        before_id: Optional[int] = None,
     ) -> tuple[str, list]:
-        sql = "SELECT timestamp, level, logger, message FROM logs"
+        sql = (
+            "SELECT logs.id, logs.timestamp, logs.level, loggers.name AS logger, logs.message"
+            " FROM logs JOIN loggers ON loggers.id = logs.logger_id"
+        )
         clauses = []
         params: list = []
         if level:
-            normalized = _normalize_level(level)
-            if normalized == VERBOSE_LEVEL_NAME:
-                clauses.append("(level = ? OR level = ?)")
-                params.extend([VERBOSE_LEVEL_NAME, "DEBUG"])
-            else:
-                clauses.append("level = ?")
-                params.append(normalized)
+            # VERBOSE and DEBUG share one number; unknown names bind NULL and match nothing.
+            clauses.append("logs.level = ?")
+            params.append(_level_number(level))
         if logger_name:
-            clauses.append("LOWER(logger) = ?")
+            clauses.append(
+                "logs.logger_id IN (SELECT id FROM loggers AS named WHERE LOWER(named.name) = ?)"
+            )
             params.append(logger_name.lower())
-        if query:
-            clauses.append("LOWER(message) LIKE ?")
-            params.append(f"%{query.lower()}%")
+        if query and self._search_index and len(query) >= 3:
+            # Quoted as one phrase: trigram matching is a case-insensitive substring search.
+            clauses.append("logs.id IN (SELECT rowid FROM logs_fts WHERE logs_fts MATCH ?)")
+            params.append('"{}"'.format(query.replace('"', '""')))
+        elif query:
+            # Trigrams can't match fewer than three characters; LIKE already folds ASCII case.
+            clauses.append("logs.message LIKE ?")
+            params.append(f"%{query}%")
+        if before_id is not None:
+            # Seek from the previous page's last id instead of re-walking newer rows.
+            clauses.append("logs.id < ?")
+            params.append(before_id)
         if clauses:
             sql += " WHERE " + " AND ".join(clauses)
-        sql += " ORDER BY id DESC LIMIT ?"
+        sql += " ORDER BY logs.id DESC LIMIT ?"
         params.append(500)
         return sql, params
 
@@ -128,36 +336,37 @@ class LogStore:
         query: Optional[str] = None,
         logger_name: Optional[str] = None,
         limit: int = 100,
+        before_id: Optional[int] = None,
     ) -> List[dict]:
-        sql, params = self._filter_query(level=level, query=query, logger_name=logger_name)
+        sql, params = self._filter_query(
+            level=level, query=query, logger_name=logger_name, before_id=before_id
+        )
         params[-1] = limit
-        with self._lock:
-            cursor = self._conn.execute(sql, params)
+        with self._reader() as conn:
+            cursor = conn.execute(sql, params)
             rows = cursor.fetchall()
-        entries = []
-        for row in rows:
-            entries.append(
-                LogEntry(
-                    timestamp=_ensure_utc(
-                        datetime.fromtimestamp(row["timestamp"], tz=timezone.utc)
-                    ),
-                    level=_normalize_level(row["level"]),
-                    logger=row["logger"],
-                    message=row["message"],
-                ).to_dict()
-            )
-        return entries
+        # LogEntry.to_dict() plus the row id, built straight from the plain tuple rows.
+        return [
+            {
+                "id": entry_id,
+                "timestamp": datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat(),
+                "level": _level_name(level_number),
+                "logger": logger,
+                "message": message,
+            }
+            for entry_id, timestamp, level_number, logger, message in rows
+        ]
 
     def list_categories(self) -> List[str]:
-        with self._lock:
-            cursor = self._conn.execute("SELECT DISTINCT logger FROM logs ORDER BY logger")
+        with self._reader() as conn:
+            cursor = conn.execute("SELECT name FROM loggers ORDER BY name")
             rows = cursor.fetchall()
         return [row[0] for row in rows]
 
     def stats(self) -> dict:
         size_bytes = self.path.stat().st_size if self.path.exists() else 0
-        with self._lock:
-            cursor = self._conn.execute("SELECT COUNT(*) FROM logs")
+        with self._reader() as conn:
+            cursor = conn.execute("SELECT COUNT(*) FROM logs")
             total_entries = cursor.fetchone()[0]
         return {
             "retention_days": self.retention_days,
@@ -167,20 +376,67 @@ class LogStore:
 
 
 class SQLiteLogHandler(logging.Handler):
-    def __init__(self, store: LogStore) -> None:
+    def __init__(self, store: LogStore, max_queue: int = 10_000) -> None:
         super().__init__()
         self.store = store
+        # Records are written by a background thread so logging callers (request handlers,
+        # the event loop) never wait on SQLite commits.
+        self._queue: queue.Queue[Optional[LogEntry]] = queue.Queue(maxsize=max_queue)
+        self._writer = threading.Thread(
+            target=self._write_batches, name="sqlite-log-writer", daemon=True
+        )
+        self._writer.start()
 
     def emit(self, record: logging.LogRecord) -> None:
-        message = self.format(record)
-        entry = LogEntry(
-            timestamp=_ensure_utc(datetime.fromtimestamp(record.created, tz=timezone.utc)),
-            level=_normalize_level(record.levelname),
-            logger=record.name,
-            message=message,
-        )
         try:
-            self.store.add_entry(entry)
+            entry = LogEntry(
+                timestamp=datetime.fromtimestamp(record.created, tz=timezone.utc),
+                level=record.levelname,
+                logger=record.name,
+                message=_record_message(record),
+                levelno=record.levelno,
+            )
         except Exception:  # noqa: BLE001
-            # Avoid breaking the running service if the log store is temporarily unavailable.
             self.handleError(record)
+            return
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            # Drop records rather than block the service when the writer falls behind.
+            return
+
+    def _next_batch(self) -> tuple[List[LogEntry], bool]:
+        first = self._queue.get()
+        if first is _LOG_SENTINEL:
+            return [], True
+        entries = [first]
+        while len(entries) < LOG_WRITE_BATCH_SIZE:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _LOG_SENTINEL:
+                return entries, True
+            entries.append(entry)
+        return entries, False
+
+    def _write_batches(self) -> None:
+        stopping = False
+        while not stopping:
+            entries, stopping = self._next_batch()
+            if not entries:
+                continue
+            try:
+                self.store.add_entries(entries)
+            except Exception:  # noqa: BLE001
+                # Avoid breaking the running service if the log store is temporarily unavailable.
+                continue
+
+    def close(self) -> None:
+        if self._writer.is_alive():
+            try:
+                self._queue.put(_LOG_SENTINEL, timeout=1.0)
+            except queue.Full:
+                pass
+            self._writer.join(timeout=5.0)
+        super().close()
@@ -1,14 +1,15 @@
 from __future__ import annotations
 
 import asyncio
+import functools
+import gzip
 import logging
 import os
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
-from fastapi import BackgroundTasks, FastAPI, HTTPException
-from fastapi.encoders import jsonable_encoder
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse, JSONResponse
 from pydantic import BaseModel, Field
@@ -35,7 +36,6 @@ def configure_logging() -> None:
     stream_handler.setFormatter(formatter)
     sqlite_handler = SQLiteLogHandler(LOG_STORE)
     sqlite_handler.setLevel(logging.DEBUG)
-    sqlite_handler.setFormatter(formatter)
 
     root_logger = logging.getLogger()
     root_logger.setLevel(logging.DEBUG)
@@ -52,9 +52,20 @@ CONFIG_PATH = Path(os.environ.get("CONFIG_PATH", "/app/config/settings.yaml")).r
 config_source = config_module.load_config(CONFIG_PATH)
 LOG_STORE.update_retention(config_source.config.logging.retention_days)
 job_manager = jobs.JobManager()
+MAX_CLAIM_BATCH = 16
+# Longest a claim may wait for a job to be queued; below the worker's 30s read timeout.
+MAX_CLAIM_WAIT = 25.0
+# GUI edits mark the settings dirty; bursts of edits are written out in one rewrite.
+CONFIG_FLUSH_INTERVAL = 5.0
+# Expired log rows are deleted on a timer rather than after every insert.
+LOG_PRUNE_INTERVAL = 60.0
+# Strong references so fire-and-forget tasks are not garbage collected mid-run.
+BACKGROUND_TASKS: Set[asyncio.Task] = set()
 
 TEMPLATE_PATH = Path(__file__).parent / "templates" / "index.html"
-INDEX_HTML = TEMPLATE_PATH.read_text()
+# Served as prebuilt bytes (plain and gzip) so requests skip encoding and compression.
+INDEX_HTML = TEMPLATE_PATH.read_bytes()
+INDEX_HTML_GZIP = gzip.compress(INDEX_HTML, 9)
 
 app = FastAPI(title="Chromecast Transcode Orchestrator", version="0.1.0")
 app.add_middleware(
@@ -80,6 +91,7 @@ class JobStatusPayload(BaseModel):
     status: str
     progress: Optional[int] = None
     message: Optional[str] = None
+    duration: Optional[float] = None
 
 
 class QueuePauseRequest(BaseModel):
@@ -110,6 +122,7 @@ class LogIngestEvent(BaseModel):
     level: str
     message: str
     timestamp: Optional[datetime] = None
+    levelno: Optional[int] = None
 
 
 class LogIngestBatch(BaseModel):
@@ -124,7 +137,10 @@ def sanitize_config(config: config_module.QualityConfig) -> Dict[str, Any]:
     return data
 
 
+@functools.lru_cache(maxsize=None)
 def encoding_payload(profile_name: str) -> Dict[str, Any]:
+    # Shared by every job queued for the profile (jobs never mutate it); update_encoding
+    # clears the cache when a profile changes.
     profile = config_source.config.profile_named(profile_name)
     return profile.model_dump()
 
@@ -154,32 +170,90 @@ def _candidate_library_roots(root: Path) -> List[Path]:
     return matches
 
 
+@functools.lru_cache(maxsize=1)
+def _library_roots() -> Tuple[Tuple[str, Tuple[Path, ...]], ...]:
+    # Libraries only change with the settings file (read at startup), so their resolved
+    # roots are computed once instead of realpath-ing every root on each event.
+    return tuple(
+        (name, tuple(_candidate_library_roots(Path(library.root))))
+        for name, library in config_source.config.libraries.items()
+    )
+
+
+def _match_library(path: Path) -> Optional[str]:
+    for name, candidate_roots in _library_roots():
+        for candidate_root in candidate_roots:
+            if path.is_relative_to(candidate_root):
+                return name
+    return None
+
+
 def find_library_for_path(path: str) -> Optional[str]:
+    # Event paths normally sit lexically under a (resolved) root already; only paths that
+    # reach a library through a symlink need the filesystem walk of resolve().
+    library = _match_library(Path(os.path.normpath(os.path.abspath(path))))
+    if library is not None:
+        return library
     try:
         normalized = Path(path).resolve()
     except FileNotFoundError:
         normalized = Path(path)
-    for name, library in config_source.config.libraries.items():
-        library_root = Path(library.root)
-        for candidate_root in _candidate_library_roots(library_root):
-            if normalized.is_relative_to(candidate_root):
-                return name
-    return None
+    return _match_library(normalized)
+
+
+def _spawn_background(coro) -> None:
+    task = asyncio.create_task(coro)
+    BACKGROUND_TASKS.add(task)
+    task.add_done_callback(BACKGROUND_TASKS.discard)
 
 
 @app.on_event("startup")
 async def startup_event() -> None:
-    LOGGER.info("Starting initial scan of configured libraries.")
-    for name, library in config_source.config.libraries.items():
-        LOGGER.info("Scanning library %s at %s", name, library.root)
-        await job_manager.scan_directory(
-            name, library.root, library.profile, encoding=encoding_payload(library.profile)
-        )
+    # The API (and /api/jobs/next) is served while the libraries are still being walked.
+    _spawn_background(_initial_scan())
+    _spawn_background(_flush_config_periodically())
+    _spawn_background(_prune_logs_periodically())
 
     jellyfin_cfg = config_source.config.jellyfin
     if jellyfin_cfg:
         LOGGER.info("Scheduling Jellyfin scans for configured libraries.")
-        asyncio.create_task(_safe_jellyfin_trigger(jellyfin_cfg))
+        _spawn_background(_safe_jellyfin_trigger(jellyfin_cfg))
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    config_module.flush_config(config_source)
+    await jellyfin.aclose()
+
+
+async def _flush_config_periodically() -> None:
+    while True:
+        await asyncio.sleep(CONFIG_FLUSH_INTERVAL)
+        try:
+            config_module.flush_config(config_source)
+        except Exception as exc:  # noqa: BLE001
+            LOGGER.error("Failed to flush settings; will retry", exc_info=exc)
+
+
+async def _prune_logs_periodically() -> None:
+    while True:
+        await asyncio.sleep(LOG_PRUNE_INTERVAL)
+        try:
+            await asyncio.to_thread(LOG_STORE.prune_expired)
+        except Exception as exc:  # noqa: BLE001
+            LOGGER.error("Failed to prune expired logs; will retry", exc_info=exc)
+
+
+async def _initial_scan() -> None:
+    LOGGER.info("Starting initial scan of configured libraries.")
+    for name, library in config_source.config.libraries.items():
+        LOGGER.info("Scanning library %s at %s", name, library.root)
+        try:
+            await job_manager.scan_directory(
+                name, library.root, library.profile, encoding=encoding_payload(library.profile)
+            )
+        except Exception as exc:  # noqa: BLE001
+            LOGGER.error("Initial scan of library %s failed", name, exc_info=exc)
 
 
 async def _safe_jellyfin_trigger(jellyfin_cfg: config_module.JellyfinConfig) -> None:
@@ -189,9 +263,31 @@ async def _safe_jellyfin_trigger(jellyfin_cfg: config_module.JellyfinConfig) ->
         LOGGER.error("Jellyfin refresh failed", exc_info=exc)
 
 
+def _accepts_gzip(accept_encoding: str) -> bool:
+    # An explicit gzip entry wins over "*"; either is refused with q=0.
+    qualities: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+
 @app.get("/", response_class=HTMLResponse)
-async def dashboard() -> HTMLResponse:
-    return HTMLResponse(INDEX_HTML)
+async def dashboard(request: Request) -> HTMLResponse:
+    # Vary goes on both variants so caches never serve one to the other's clients.
+    headers = {"Vary": "Accept-Encoding"}
+    if _accepts_gzip(request.headers.get("accept-encoding", "")):
+        headers["Content-Encoding"] = "gzip"
+        return HTMLResponse(INDEX_HTML_GZIP, headers=headers)
+    return HTMLResponse(INDEX_HTML, headers=headers)
 
 
 @app.get("/api/healthz")
@@ -206,11 +302,7 @@ async def readyz() -> JSONResponse:
 
 @app.get("/api/metrics")
 async def metrics() -> JSONResponse:
-    jobs_list = await job_manager.list_jobs()
-    count_by_status: Dict[str, int] = {}
-    for job in jobs_list:
-        count_by_status[job.status] = count_by_status.get(job.status, 0) + 1
-    return JSONResponse({"jobs": count_by_status})
+    return JSONResponse({"jobs": await job_manager.count_by_status()})
 
 
 @app.get("/api/config")
@@ -235,11 +327,13 @@ async def update_encoding(payload: EncodingUpdatePayload) -> JSONResponse:
                 "preset": payload.preset,
                 "cq": payload.cq,
                 "rc": payload.rc,
-                "audio": payload.audio.model_dump(),
+                # Already validated with the payload; pydantic reuses the instance as-is.
+                "audio": payload.audio,
             },
         )
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(status_code=422, detail=str(exc))
+    encoding_payload.cache_clear()
     return JSONResponse({"name": payload.name, "profile": profile.model_dump()})
 
 
@@ -248,9 +342,14 @@ async def list_logs(
     level: Optional[str] = None,
     query: Optional[str] = None,
     logger: Optional[str] = None,
+    before_id: Optional[int] = Query(None, ge=1),
 ) -> JSONResponse:
-    entries = LOG_STORE.list_entries(level=level, query=query, logger_name=logger, limit=200)
-    return JSONResponse(entries)
+    entries = LOG_STORE.list_entries(
+        level=level, query=query, logger_name=logger, limit=200, before_id=before_id
+    )
+    # Entries are newest first; the last id is the cursor for the next (older) page.
+    headers = {"X-Next-Before-Id": str(entries[-1]["id"])} if entries else None
+    return JSONResponse(entries, headers=headers)
 
 
 @app.get("/api/logs/categories")
@@ -265,53 +364,82 @@ async def log_stats() -> JSONResponse:
 
 @app.post("/api/logs/ingest")
 async def ingest_logs(batch: LogIngestBatch) -> JSONResponse:
-    stored = 0
-    for entry in batch.entries:
-        LOG_STORE.add_entry(
-            LogEntry(
-                timestamp=entry.timestamp or datetime.now(timezone.utc),
-                level=entry.level,
-                logger=entry.logger,
-                message=entry.message,
-            )
+    stored = LOG_STORE.add_entries(
+        LogEntry(
+            timestamp=entry.timestamp or datetime.now(timezone.utc),
+            level=entry.level,
+            logger=entry.logger,
+            message=entry.message,
+            levelno=entry.levelno,
         )
-        stored += 1
+        for entry in batch.entries
+    )
     return JSONResponse({"stored": stored})
 
 
 @app.post("/api/config/logging")
 async def update_logging(payload: LoggingUpdatePayload) -> JSONResponse:
     config_source.config.logging.retention_days = payload.retention_days
-    config_module.persist_config(config_source)
+    config_source.dirty = True
     LOG_STORE.update_retention(payload.retention_days)
     LOGGER.info("Updated log retention to %s days", payload.retention_days)
     return JSONResponse({"retention_days": payload.retention_days})
 
 
 @app.get("/api/jobs")
-async def list_jobs() -> JSONResponse:
-    jobs_list = await job_manager.list_jobs()
-    return JSONResponse(jsonable_encoder([job.model_dump() for job in jobs_list]))
+async def list_jobs(
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+) -> JSONResponse:
+    # Without ``limit`` every job is returned; X-Total-Count lets clients page.
+    jobs_list = await job_manager.list_jobs(offset=offset, limit=limit)
+    total = await job_manager.count_jobs()
+    return JSONResponse(
+        [job.to_dict() for job in jobs_list],
+        headers={"X-Total-Count": str(total)},
+    )
 
 
 @app.get("/api/jobs/next")
-async def next_job() -> JSONResponse:
+async def next_job(
+    request: Request,
+    batch: Optional[int] = Query(None, ge=1, le=MAX_CLAIM_BATCH),
+    wait: Optional[float] = Query(None, ge=0),
+) -> JSONResponse:
     queue_state = await job_manager.queue_state()
     if queue_state["paused"]:
         return JSONResponse(queue_state | {"detail": "Queue paused"}, status_code=409)
-    job = await job_manager.acquire_next()
-    if job is None:
+    # ``batch`` hands out up to N jobs as a list in one round trip; without it a
+    # single job object is returned as before.
+    acquired = await job_manager.acquire_batch(batch or 1)
+    # ``wait`` long-polls: an empty queue holds the request until a job is queued
+    # instead of the worker coming back to find it empty again.
+    # Longer waits are clamped rather than rejected, so any worker setting still claims.
+    if not acquired and wait:
+        await job_manager.wait_for_jobs(min(wait, MAX_CLAIM_WAIT))
+        # Jobs handed to a worker that has gone away would sit in "running" forever.
+        if not await request.is_disconnected():
+            acquired = await job_manager.acquire_batch(batch or 1)
+    if not acquired:
         raise HTTPException(status_code=204, detail="No jobs available")
-    return JSONResponse(jsonable_encoder(job.model_dump()))
+    if batch is None:
+        return JSONResponse(acquired[0].to_dict())
+    return JSONResponse([job.to_dict() for job in acquired])
 
 
 @app.post("/api/jobs/{job_id}/status")
 async def update_job_status(job_id: str, payload: JobStatusPayload) -> JSONResponse:
     try:
-        job = await job_manager.update_job(job_id, jobs.JobStatusUpdate(**payload.model_dump()))
+        update = jobs.JobStatusUpdate(
+            status=payload.status,
+            progress=payload.progress,
+            message=payload.message,
+            duration=payload.duration,
+        )
+        job = await job_manager.update_job(job_id, update)
     except KeyError:
         raise HTTPException(status_code=404, detail="Job not found")
-    return JSONResponse(jsonable_encoder(job.model_dump()))
+    return JSONResponse(job.to_dict())
 
 
 @app.get("/api/queue/state")
@@ -368,4 +496,4 @@ async def handle_event(payload: EventPayload) -> JSONResponse:
         )
     except ValueError as exc:
         raise HTTPException(status_code=409, detail=str(exc))
-    return JSONResponse(jsonable_encoder(job.model_dump()))
+    return JSONResponse(job.to_dict())